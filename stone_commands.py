@@ -1,7 +1,48 @@
-from typing import Deque, Iterator, Iterable, Tuple, Callable, MutableSequence, MutableMapping, Optional, Union, Type, TYPE_CHECKING
+from typing import Deque, Iterator, Iterable, Tuple, Callable, MutableSequence, Mapping, MutableMapping, Optional, Union, Type, TYPE_CHECKING
 from enum import Enum
 from collections import deque
-import json
+import struct
+import sys
+
+# orjson is a lot faster and produces bytes directly,
+# fall back to the standard library if it is not available
+try:
+    import orjson
+
+    def _dumps(value:object) -> bytes:
+        return orjson.dumps(value)
+
+    # command items are dumped like any other object
+    _dumps_items = _dumps
+except ImportError:
+    import json
+    import math
+    import re
+
+    def _dumps_str(value:object) -> str:
+        return json.dumps(value, ensure_ascii = False, separators = (',', ':'))
+
+    def _dumps(value:object) -> bytes:
+        return _dumps_str(value).encode('UTF-8')
+
+    # characters that need escaping inside a json string
+    _json_escaped = re.compile(r'["\\\x00-\x1f]')
+
+    def _dumps_value(value:object) -> str:
+        value_type = type(value)
+        if value_type is bool:
+            return 'true' if value else 'false'
+        if value_type is int or (value_type is float and math.isfinite(value)):
+            return repr(value)
+        if value_type is str and not _json_escaped.search(value):
+            return f'"{value}"'
+        return _dumps_str(value)
+
+    def _dumps_items(items:MutableMapping[str, object]) -> bytes:
+        # command items are mostly primitive values, formatting them directly
+        # is several times faster than going through json.dumps
+        body = ','.join(f'{_dumps_value(key)}:{_dumps_value(value)}' for key, value in items.items())
+        return ('{' + body + '}').encode('UTF-8')
 
 if TYPE_CHECKING:
     from . import StoneWidget
@@ -9,8 +50,14 @@ if TYPE_CHECKING:
 # types of values allowed in a command
 CommandPrimitiveValue = Union[str, int, float, bool, Enum]
 CommandValue = Union[CommandPrimitiveValue, Iterable[CommandPrimitiveValue]]
+# exact types which can be stored without conversion, checked before the slower isinstance(value, Enum)
+_plain_value_types = frozenset((str, int, float, bool))
 message_start = 'ST<'
 message_end = '>ET'
+message_start_bytes = message_start.encode('ascii')
+message_end_bytes = message_end.encode('ascii')
+# response header, big endian command code and data length
+response_header = struct.Struct('>HH')
 
 #!#########################!#
 #!         COMMAND         !#
@@ -20,6 +67,9 @@ class StoneCommandType:
     Object describing basic commands to the STONE HMI display.
     """
 
+    # maximum number of released commands kept for reuse, per command type
+    pool_size = 32
+
     def __init__(self, cmd_code:str, cmd_type:str = 'system') -> None:
         """
         Initialize a generic STONE command type.
@@ -28,8 +78,14 @@ class StoneCommandType:
             cmd_code (str): Specific command code according to STONE docs.
             cmd_type (str, optional): String for the type of command according to STONE docs. Defaults to 'system'.
         """
-        self.cmd_code = cmd_code
+        # command codes are the keys of the widget command queues, interned so lookups can compare by identity
+        self.cmd_code = sys.intern(cmd_code)
         self.cmd_type = cmd_type
+        # constant start of the serialized json object (without the closing brace),
+        # computed once here instead of for every command
+        self._header = _dumps({'cmd_code': cmd_code, 'type': cmd_type})[:-1]
+        # released commands of this type, to be reused instead of allocating new ones
+        self._pool:MutableSequence['StoneCommand'] = []
 
     def new(self) -> 'StoneCommand':
         """
@@ -38,7 +94,26 @@ class StoneCommandType:
         Returns:
             StoneCommand: Instance of a command object with its type information filled in, without values.
         """
-        return StoneCommand(self.cmd_code, self.cmd_type)
+        if self._pool:
+            return self._pool.pop()
+        command = StoneCommand(self.cmd_code, self.cmd_type, self._header)
+        command._pool = self._pool
+        return command
+
+    def build(self, widget:'StoneWidget', items:Mapping[str, CommandValue]) -> 'StoneCommand':
+        """
+        Generate new command object instance with values inserted, to be pushed by a widget.
+
+        Args:
+            widget (StoneWidget): Widget pushing the command, system commands do not use it.
+            items (Mapping[str, CommandValue]): Values to be inserted into the command.
+
+        Returns:
+            StoneCommand: Instance of a command object with its type information and values filled in.
+        """
+        command = self.new()
+        command._owned = True
+        return command.build(widget, items)
 
 class StoneWidgetCommandType(StoneCommandType):
     """
@@ -80,8 +155,10 @@ class StoneWidgetCommandType(StoneCommandType):
         Returns:
             StoneWidgetCommandType: A new copy of the original command type, with all the same contents.
         """
-        result = StoneWidgetCommandType(self.cmd_code, self.widget_type)
-        result.widget = self.widget
+        # copy the attributes directly, the constructor would serialize the header again,
+        # the copy shares the header and the pool of released commands
+        result = object.__new__(type(self))
+        result.__dict__.update(self.__dict__)
         return result
 
     def new(self) -> 'StoneCommand':
@@ -96,19 +173,75 @@ class StoneWidgetCommandType(StoneCommandType):
         """
         if self.widget is None:
             raise ValueError('Cannot create a Stone widget command if the widget reference is not set')
-        return StoneWidgetCommand(self.cmd_code, self.cmd_type, self.widget)
+        return self._new_for(self.widget)
+
+    def build(self, widget:'StoneWidget', items:Mapping[str, CommandValue]) -> 'StoneCommand':
+        """
+        Generate new command object instance for the widget with values inserted,
+        without assigning the widget to a copy of the command type first.
+
+        Args:
+            widget (StoneWidget): Widget the command is for.
+            items (Mapping[str, CommandValue]): Values to be inserted into the command.
+
+        Returns:
+            StoneCommand: A new command object instance.
+        """
+        command = self._new_for(widget)
+        command._owned = True
+        return command.build(widget, items)
+
+    def _new_for(self, widget:'StoneWidget') -> 'StoneCommand':
+        header = self._header + widget._widget_field
+        if self._pool:
+            command = self._pool.pop()
+            if not isinstance(command, StoneWidgetCommand):
+                raise TypeError(f'Expected a pooled {StoneWidgetCommand.__name__}, not {type(command).__name__}')
+            command.widget = widget
+            command._header = header
+            return command
+        command = StoneWidgetCommand(self.cmd_code, self.cmd_type, widget, header)
+        command._pool = self._pool
+        return command
 
 class StoneCommand:
 
-    def __init__(self, cmd_code:str, cmd_type:str = 'system') -> None:
+    __slots__ = ('cmd_code', 'cmd_type', 'cmd_items', '_header', '_serialized', '_pool', '_owned')
+
+    def __init__(self, cmd_code:str, cmd_type:str = 'system', header:Optional[bytes] = None) -> None:
         self.cmd_code = cmd_code
         self.cmd_type = cmd_type
         self.cmd_items = {}
+        # serialized body without the closing brace, may be precomputed by the command type
+        self._header = header if header is not None else _dumps(self.body)[:-1]
+        # serialized packet, cached until the command is modified
+        self._serialized:Optional[bytes] = None
+        # pool of the command type this command is returned to when released, if any
+        self._pool:Optional[MutableSequence['StoneCommand']] = None
+        # set only for commands built by a command type when pushed, the caller holds no reference to those,
+        # commands from new() belong to the caller and are never pooled
+        self._owned = False
 
     def __setitem__(self, key:str, value:CommandValue) -> None:
-        if isinstance(value, Enum):
+        if type(value) not in _plain_value_types and isinstance(value, Enum):
             value = value.value
         self.cmd_items[key] = value
+        self._serialized = None
+
+    def update(self, items:Mapping[str, CommandValue]) -> None:
+        """
+        Insert multiple values into the command at once.
+
+        Args:
+            items (Mapping[str, CommandValue]): Values to be inserted into the command.
+        """
+        cmd_items = self.cmd_items
+        # copy everything in one call, then convert the (rare) enum values
+        cmd_items.update(items)
+        for key, value in items.items():
+            if type(value) not in _plain_value_types and isinstance(value, Enum):
+                cmd_items[key] = value.value
+        self._serialized = None
 
     @property
     def body(self) -> MutableMapping[str, str]:
@@ -118,29 +251,63 @@ class StoneCommand:
         }
 
     @property
-    def serialized(self) -> str:
-        body = json.dumps({
-            **self.body,
-            **self.cmd_items
-        }, ensure_ascii = False)
-        result = f'{message_start}{body}{message_end}'
-        return result
+    def serialized(self) -> bytes:
+        if self._serialized is None:
+            if self.cmd_items:
+                # items are appended to the header in place of their opening brace
+                items = _dumps_items(self.cmd_items)[1:]
+                self._serialized = b''.join((message_start_bytes, self._header, b',', items, message_end_bytes))
+            else:
+                self._serialized = b''.join((message_start_bytes, self._header, b'}', message_end_bytes))
+        return self._serialized
+
+    def build(self, widget:'StoneWidget', items:Mapping[str, CommandValue]) -> 'StoneCommand':
+        """
+        Insert values into this command, so that command instances can be pushed the same way as command types.
+
+        Args:
+            widget (StoneWidget): Widget pushing the command, not used by command instances.
+            items (Mapping[str, CommandValue]): Values to be inserted into the command.
+
+        Returns:
+            StoneCommand: This command instance.
+        """
+        self.update(items)
+        return self
+
+    def release(self) -> None:
+        """
+        Return the command to the pool of its command type, to be reused by the next command of the same type.
+        Only commands built by a command type when pushed are pooled, releasing any other command does nothing,
+        as does releasing a command again. The command must not be used after it is released.
+        """
+        pool = self._pool
+        if not self._owned or pool is None:
+            return
+        self._owned = False
+        if len(pool) >= StoneCommandType.pool_size:
+            return
+        self.cmd_items.clear()
+        self._serialized = None
+        pool.append(self)
 
     def __repr__(self) -> str:
-        return self.serialized
+        return self.serialized.decode('UTF-8')
 
 class StoneWidgetCommand(StoneCommand):
 
-    def __init__(self, cmd_code:str, cmd_type:str, widget:'StoneWidget') -> None:
-        super().__init__(cmd_code, cmd_type)
+    __slots__ = ('widget',)
+
+    def __init__(self, cmd_code:str, cmd_type:str, widget:'StoneWidget', header:Optional[bytes] = None) -> None:
+        # widget has to be set first, the header is generated from the body if not given
         self.widget = widget
+        super().__init__(cmd_code, cmd_type, header)
 
     @property
     def body(self) -> MutableMapping[str, str]:
-        return {
-            **super().body,
-            'widget': self.widget.instance_name,
-        }
+        body = super().body
+        body['widget'] = self.widget.instance_name
+        return body
 
 #!##########################!#
 #!         RESPONSE         !#
@@ -149,13 +316,41 @@ class StoneWidgetCommand(StoneCommand):
 class StoneResponseBuffer:
 
     def __init__(self) -> None:
-        self.buffer:Deque[int] = deque()
-        self.buffering = False
+        self.buffer = bytearray()
+        # offset into the buffer from which to continue searching for the end marker
+        # of a message started in previous data, so it is not scanned again
+        self._end_scan = 0
         self.queue:Deque[bytes] = deque()
 
     def push(self, data:bytes) -> None:
-        for byte in data:
-            self.process_byte(byte)
+        buffer = self.buffer
+        buffer.extend(data)
+        # read cursor, everything before it is consumed and dropped at the end
+        position = 0
+        # packets are copied out through a view, slicing the bytearray itself would copy them twice
+        # (the view has to be released before the buffer can be resized)
+        with memoryview(buffer) as view:
+            while True:
+                start = buffer.find(message_start_bytes, position)
+                if start < 0:
+                    # keep only the tail, which may be the beginning of a split start marker
+                    position = max(position, len(buffer) - (len(message_start_bytes) - 1))
+                    self._end_scan = 0
+                    break
+                data_start = start + len(message_start_bytes)
+                end = buffer.find(message_end_bytes, max(data_start, self._end_scan))
+                if end < 0:
+                    # only the tail may contain the beginning of a split end marker,
+                    # offset relative to the start of the message, which becomes the start of the buffer
+                    self._end_scan = len(buffer) - (len(message_end_bytes) - 1) - start
+                    position = start
+                    break
+                # a repeated start marker restarts the message
+                start = buffer.rfind(message_start_bytes, start, end)
+                self.queue.append(bytes(view[start + len(message_start_bytes):end]))
+                position = end + len(message_end_bytes)
+                self._end_scan = 0
+        del buffer[:position]
 
     def pop(self) -> Optional[bytes]:
         if len(self.queue) > 0:
@@ -166,22 +361,14 @@ class StoneResponseBuffer:
     def empty(self) -> bool:
         return len(self.queue) == 0
 
-    @property
-    def buffered_str(self) -> str:
-        return ''.join(chr(byte) for byte in self.buffer)
-
-    def process_byte(self, byte:int) -> None:
-        self.buffer.append(byte)
-        if self.buffering and self.buffered_str.endswith(message_end):
-            self.queue.append(bytes(self.buffer)[:-len(message_end)])
-            self.buffering = False
-        if self.buffered_str.endswith(message_start):
-            self.buffer.clear()
-            self.buffering = True
+# registered response types, mapped cmd_code --to-> response type
+_response_types:MutableMapping[int, 'StoneResponseType'] = {}
 
 class StoneResponseType:
 
-    existing_types:MutableMapping[int, 'StoneResponseType'] = {}
+    __slots__ = ('cmd_code', 'parser')
+
+    existing_types = _response_types
 
     def __init__(
         self,
@@ -198,26 +385,29 @@ class StoneResponseType:
 
     @staticmethod
     def decode(raw:bytes) -> Optional['StoneResponse']:
-        cmd_code = int.from_bytes(raw[0:2], 'big')
-        cmd_len = int.from_bytes(raw[2:4], 'big')
-        raw_data = raw[4:]
-        if len(raw_data) != cmd_len:
-            raise ValueError(f'True length of data ({len(raw_data)}) did not match the defined length ({cmd_len})')
-        try:
-            response_type = StoneResponseType.existing_types[cmd_code]
-            return response_type.new(raw_data)
-        except KeyError:
+        if len(raw) < response_header.size:
+            raise ValueError(f'Response is too short ({len(raw)}) to contain a header')
+        cmd_code, cmd_len = response_header.unpack_from(raw)
+        data_len = len(raw) - response_header.size
+        if data_len != cmd_len:
+            raise ValueError(f'True length of data ({data_len}) did not match the defined length ({cmd_len})')
+        response_type = _response_types.get(cmd_code)
+        if response_type is None:
             return None
+        return response_type.new(raw[response_header.size:])
 
     def new(self, raw_data:bytes) -> 'StoneResponse':
         return StoneResponse(self.cmd_code, self.parser(raw_data))
 
 class StoneWidgetResponseType(StoneResponseType):
 
+    __slots__ = ('widget_name_parser',)
+
     @staticmethod
     def parse_widget_name(raw:bytes) -> str:
-        widget_name, *_ = raw.decode('ascii').split(' ')
-        return widget_name
+        # only decode the name, not the whole payload
+        widget_name, _, _ = raw.partition(b' ')
+        return widget_name.decode('ascii')
 
     def __init__(
         self,
@@ -233,6 +423,8 @@ class StoneWidgetResponseType(StoneResponseType):
 
 class StoneResponse:
 
+    __slots__ = ('cmd_code', 'cmd_data')
+
     def __init__(
         self,
         cmd_code:int,
@@ -246,6 +438,8 @@ class StoneResponse:
 
 class StoneWidgetResponse(StoneResponse):
 
+    __slots__ = ('widget_name',)
+
     def __init__(
         self,
         cmd_code:int,
@@ -1,5 +1,4 @@
 from typing import (
-    Deque,
     Tuple,
     MutableSequence,
     MutableMapping,
@@ -8,28 +7,40 @@ from typing import (
     Union,
     TypeVar,
     Type,
-    TYPE_CHECKING
 )
-from collections import deque
-from datetime import datetime, timedelta
+import time
 import serial
 from WatteeSmartSystem.Modules import utils
-
-if TYPE_CHECKING:
-    from . import (
-        StoneWidget,
-        StoneWindow,
-        StoneCommand,
-        StoneResponseType,
-    )
+# the display module is imported last by the package, everything else is already defined
+from . import (
+    StoneWidget,
+    StoneWindow,
+    StoneCommand,
+    StoneCommandType,
+    StoneResponseType,
+    StoneResponseBuffer,
+    StoneResponse,
+    StoneWidgetResponse,
+)
 
 class StoneDisplay:
 
     def __init__(self) -> None:
-        from . import StoneWindow, StoneCommandType, StoneResponseType, StoneResponseBuffer
         #! children
         self._home_window = StoneWindow('home_page')
+        self._home_window._display = self
         self.windows:MutableSequence[StoneWindow] = [ self.home_window ]
+        # flattened widget tree and widgets mapped by name,
+        # rebuilt together on the next use whenever the widget tree changes
+        self._flat_widgets:MutableSequence['StoneWidget'] = []
+        self._widget_index:MutableMapping[str, 'StoneWidget'] = {}
+        self._tree_dirty = True
+        # windows the widget tree was built from, windows may be added to the list directly,
+        # which is only noticed by comparing the list with this
+        self._tree_windows:Tuple['StoneWindow', ...] = ()
+        # widgets which have pushed commands since the last gather, in order (values are unused),
+        # so that idle widgets do not have to be visited
+        self._pending_widgets:MutableMapping['StoneWidget', None] = {}
 
         #! serial port config
         self.port = ''
@@ -38,29 +49,30 @@ class StoneDisplay:
         self.parity = 'N'
         self.stopbits = 1
         self.serial_timeout = .0
+        # largest chunk written to the port at once, to avoid stalling on the driver buffer
+        self.max_write_size = 4096
         self.serial:Optional[serial.Serial] = None
 
         #! response handling
         self.response_buffer = StoneResponseBuffer()
 
         # ping (hello) response
-        if not StoneDisplay.sys_hello_response: 
-            StoneDisplay.sys_hello_response = StoneResponseType(0x0001, lambda data: {'connected': data == b'\x01'})
         self.home_window.add_response_handler(StoneDisplay.sys_hello_response, self._set_connected)
         self._connected = False
-        self.ping_timeout_time:Optional[datetime] = None
+        # time.monotonic() value after which an unanswered ping means disconnected
+        self.ping_timeout_time:Optional[float] = None
 
-        #! system commands
-        self.set_buzzer = StoneCommandType('set_buzzer')
+        #! system state
         self._brightness = 100
-        self.set_brightness = StoneCommandType('set_brightness')
-        self.sys_hello = StoneCommandType('sys_hello')
-        self.sys_reboot = StoneCommandType('sys_reboot')
 
-    # response types should be class variables, to be shared between instances,
-    # but to avoid import conflicts, lazy loading is prefered
-    # (create the instance in the init function, but only the first time)
-    sys_hello_response:Optional['StoneResponseType'] = None
+    #! system commands, shared between instances
+    set_buzzer = StoneCommandType('set_buzzer')
+    set_brightness = StoneCommandType('set_brightness')
+    sys_hello = StoneCommandType('sys_hello')
+    sys_reboot = StoneCommandType('sys_reboot')
+
+    # response types are class variables, to be shared between instances
+    sys_hello_response = StoneResponseType(0x0001, lambda data: {'connected': data == b'\x01'})
 
     def config_serial(
         self,
@@ -77,8 +89,7 @@ class StoneDisplay:
         if parity is not None: self.parity = parity
         if stopbits is not None: self.stopbits = stopbits
         if timeout is not None: self.serial_timeout = timeout
-        if self.serial:
-            self.serial.close()
+        self.close()
         self.serial = serial.Serial(
             self.port,
             self.baudrate,
@@ -88,6 +99,15 @@ class StoneDisplay:
             self.serial_timeout,
         )
 
+    def close(self) -> None:
+        """
+        Close the serial port, it is kept open between writes and reads otherwise.
+        Calling config_serial opens it again with the current configuration.
+        """
+        if self.serial:
+            self.serial.close()
+            self.serial = None
+
     def reboot(self) -> None:
         self.home_window.push_command(self.sys_reboot)
 
@@ -106,10 +126,7 @@ class StoneDisplay:
 
     @property
     def _is_timed_out(self) -> bool:
-        try:
-            return self.ping_timeout_time is not None and datetime.now() >= self.ping_timeout_time
-        except:
-            return False
+        return self.ping_timeout_time is not None and time.monotonic() >= self.ping_timeout_time
 
     def _set_connected(self, connected:bool) -> None:
         self.ping_timeout_time = None
@@ -117,21 +134,58 @@ class StoneDisplay:
 
     @property
     def all_widgets(self) -> Iterable['StoneWidget']:
-        widget_queue:Deque['StoneWidget'] = deque(self.windows)
-        while len(widget_queue) > 0:
-            next_widget = widget_queue.pop()
-            widget_queue.extendleft(next_widget.children)
+        self._update_widget_tree()
+        return iter(self._flat_widgets)
+
+    def _update_widget_tree(self) -> None:
+        windows = tuple(self.windows)
+        if not self._tree_dirty and windows == self._tree_windows:
+            return
+        # windows removed from the list no longer pass the commands of their widgets to this display
+        for window in self._tree_windows:
+            if window not in windows and window._display is self:
+                window._display = None
+        self._tree_windows = windows
+        self._flat_widgets = []
+        self._widget_index = {}
+        # windows added to the list directly do not know their display yet
+        for window in windows:
+            window._display = self
+        for widget in self._walk_widgets():
+            self._flat_widgets.append(widget)
+            # keep the first widget found, in case names are not unique
+            self._widget_index.setdefault(widget.instance_name, widget)
+        # only widgets in the tree are gathered, in their pending order,
+        # followed by widgets which pushed commands before they were part of the display
+        in_tree = set(self._flat_widgets)
+        self._pending_widgets = {widget: None for widget in self._pending_widgets if widget in in_tree}
+        for widget in self._flat_widgets:
+            if widget.has_commands:
+                self._add_pending_widget(widget)
+        self._tree_dirty = False
+
+    def _walk_widgets(self) -> Iterable['StoneWidget']:
+        # depth first, windows and children in their order, using a list as the stack
+        widget_stack:MutableSequence['StoneWidget'] = list(reversed(self.windows))
+        while widget_stack:
+            next_widget = widget_stack.pop()
+            widget_stack.extend(reversed(next_widget.children))
             yield next_widget
 
+    def _add_pending_widget(self, widget:'StoneWidget') -> None:
+        self._pending_widgets[widget] = None
+
     def gather_commands(self) -> Iterable['StoneCommand']:
-        for widget in self.all_widgets:
-            while widget.has_commands:
-                yield widget.pop_command()
+        self._update_widget_tree()
+        widgets, self._pending_widgets = self._pending_widgets, {}
+        for widget in widgets:
+            yield from widget.drain_commands()
 
     def add_window(self, name:str) -> 'StoneWindow':
-        from . import StoneWindow
         new_window = StoneWindow(name)
+        new_window._display = self
         self.windows.append(new_window)
+        self._invalidate_widget_tree()
         return new_window
 
     def write_commands(self) -> None:
@@ -140,22 +194,33 @@ class StoneDisplay:
         try:
             if not self.serial.is_open:
                 self.serial.open()
+            # send all pending commands together, in as few writes as possible
+            packets = []
             for command in self.gather_commands():
-                packet = command.serialized.encode('UTF-8')
-                self.serial.write(packet)
+                packets.append(command.serialized)
+                # the packet is kept, the command object can be reused
+                command.release()
+            data = b''.join(packets)
+            # pyserial converts anything but bytes to bytes again, so the usual burst is written as it is,
+            # slicing only copies the bursts which are larger than max_write_size
+            if len(data) > self.max_write_size:
+                for offset in range(0, len(data), self.max_write_size):
+                    self.serial.write(data[offset:offset + self.max_write_size])
+            elif data:
+                self.serial.write(data)
         except:
             utils.reboot()
 
     def read_responses(self) -> None:
-        from . import StoneResponseType, StoneWidgetResponse, StoneResponse
         if not self.serial:
             return
         try:
             if not self.serial.is_open:
                 self.serial.open()
-            read_result = self.serial.read_all()
-            if read_result:
-                self.response_buffer.push(read_result)
+            # read_all queries in_waiting as well, check it once and skip reading when idle
+            waiting = self.serial.in_waiting
+            if waiting:
+                self.response_buffer.push(self.serial.read(waiting))
             while packet := self.response_buffer.pop():
                 response = StoneResponseType.decode(packet)
                 if isinstance(response, StoneWidgetResponse):
@@ -165,11 +230,15 @@ class StoneDisplay:
         except:
             self.serial.close()
 
+    def _invalidate_widget_tree(self) -> None:
+        self._tree_dirty = True
+
     def find_by_name(self, key:str) -> 'StoneWidget':
-        for widget in self.all_widgets:
-            if widget.instance_name == key:
-                return widget
-        raise KeyError(f'Widget with name "{key}" was not found on the display')
+        self._update_widget_tree()
+        widget = self._widget_index.get(key)
+        if widget is None:
+            raise KeyError(f'Widget with name "{key}" was not found on the display')
+        return widget
 
     T = TypeVar('T', bound = 'StoneWidget')
     def __getitem__(self, key:Tuple[str, Type[T]]) -> T:
@@ -185,7 +254,7 @@ class StoneDisplay:
     def ping(self, timeout_s:float = 3.) -> None:
         if self.ping_timeout_time is None:
             self.home_window.push_command(self.sys_hello)
-            self.ping_timeout_time = datetime.now() + timedelta(seconds = timeout_s)
+            self.ping_timeout_time = time.monotonic() + timeout_s
         # to allow another ping immediately if the current one times out
         elif self._is_timed_out:
             self._set_connected(False)
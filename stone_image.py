@@ -4,8 +4,14 @@ from . import StoneWidget, StoneWidgetCommandType
 
 class StoneImage(StoneWidget):
 
+    __slots__ = ('_image', '_set_image', '_draw_type')
+
     type_name = 'image'
 
+    # commands shared by all instances (assigned below the class, as they need a reference to it)
+    set_image:StoneWidgetCommandType
+    set_draw_type:StoneWidgetCommandType
+
     class DrawType(Enum):
         DEFAULT = 0
         CENTER = 1
@@ -25,9 +31,7 @@ class StoneImage(StoneWidget):
 
         self._image = ''
         self._set_image = ''
-        self.set_image = StoneWidgetCommandType('set_image', StoneImage)
         self._draw_type = StoneImage.DrawType.DEFAULT
-        self.set_draw_type = StoneWidgetCommandType('set_draw_type', StoneImage)
 
     @property
     def image(self) -> str:
@@ -51,5 +55,10 @@ class StoneImage(StoneWidget):
 
     @draw_type.setter
     def draw_type(self, value:DrawType) -> None:
+        if value == self._draw_type:
+            return
         self._draw_type = value
-        self.push_command(self.set_draw_type, draw_type = self._draw_type)
\ No newline at end of file
+        self.push_command(self.set_draw_type, draw_type = self._draw_type)
+
+StoneImage.set_image = StoneWidgetCommandType('set_image', StoneImage)
+StoneImage.set_draw_type = StoneWidgetCommandType('set_draw_type', StoneImage)
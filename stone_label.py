@@ -3,16 +3,20 @@ from . import StoneWidget, StoneWidgetCommandType
 
 class StoneLabel(StoneWidget):
 
+    __slots__ = ('_text', '_value', '_format')
+
     type_name = 'label'
 
+    # commands shared by all instances (assigned below the class, as they need a reference to it)
+    set_text:StoneWidgetCommandType
+    set_value:StoneWidgetCommandType
+
     def __init__(self, name:str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
 
         self._text = ''
         self._value = 0.
         self._format = ''
-        self.set_text = StoneWidgetCommandType('set_text', StoneLabel)
-        self.set_value = StoneWidgetCommandType('set_value', StoneLabel)
 
     @property
     def text(self) -> str:
@@ -20,6 +24,9 @@ class StoneLabel(StoneWidget):
 
     @text.setter
     def text(self, value:str) -> None:
+        # a non empty text means the label is showing it, an empty one could also mean a value is shown
+        if value and value == self._text:
+            return
         self._text = value
         self._value = 0
         self.push_command(self.set_text, text = self._text)
@@ -30,6 +37,9 @@ class StoneLabel(StoneWidget):
 
     @value.setter
     def value(self, value:Union[float, int]) -> None:
+        # setting text resets the value to 0, so only a non zero value is known to be shown
+        if value and value == self._value:
+            return
         self._value = value
         self._text = ''
         self.push_command(self.set_value, value = self._value, format = self._format)
@@ -40,5 +50,12 @@ class StoneLabel(StoneWidget):
 
     @format.setter
     def format(self, value:str) -> None:
+        if value == self._format:
+            return
         self._format = value
-        self.push_command(self.set_value, value = self._value, format = self._format)
\ No newline at end of file
+        # while a text is shown the format is only stored, it is sent with the next value
+        if not self._text:
+            self.push_command(self.set_value, value = self._value, format = self._format)
+
+StoneLabel.set_text = StoneWidgetCommandType('set_text', StoneLabel)
+StoneLabel.set_value = StoneWidgetCommandType('set_value', StoneLabel)
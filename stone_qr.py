@@ -3,13 +3,17 @@ from . import StoneWidget, StoneWidgetCommandType
 
 class StoneQr(StoneWidget):
 
+    __slots__ = ('_text',)
+
     type_name = 'qr'
 
+    # commands shared by all instances (assigned below the class, as they need a reference to it)
+    set_text:StoneWidgetCommandType
+
     def __init__(self, name:str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
 
         self._text = ''
-        self.set_text = StoneWidgetCommandType('set_text', StoneQr)
 
     @property
     def text(self) -> str:
@@ -17,5 +21,9 @@ class StoneQr(StoneWidget):
 
     @text.setter
     def text(self, value:str) -> None:
+        if value == self._text:
+            return
         self._text = value
-        self.push_command(self.set_text, text = self._text)
\ No newline at end of file
+        self.push_command(self.set_text, text = self._text)
+
+StoneQr.set_text = StoneWidgetCommandType('set_text', StoneQr)
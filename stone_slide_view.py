@@ -3,19 +3,25 @@ from . import StoneWidget, StoneWidgetCommandType
 
 class StoneSlideViewPage(StoneWidget):
 
+    __slots__ = ()
+
     def __init__(self, name: str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
 
 class StoneSlideView(StoneWidget):
 
+    __slots__ = ('_index', '_auto_play')
+
     type_name = 'slide_view'
 
+    # commands shared by all instances (assigned below the class, as they need a reference to it)
+    set_view:StoneWidgetCommandType
+    set_auto_play:StoneWidgetCommandType
+
     def __init__(self, name:str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
         self._index = 0
-        self.set_view = StoneWidgetCommandType('set_view', StoneSlideView)
         self._auto_play:int = 0
-        self.set_auto_play = StoneWidgetCommandType('set_auto_play', StoneSlideView)
 
     def add_page(self, name:str) -> StoneSlideViewPage:
         return StoneSlideViewPage(name, self)
@@ -33,6 +39,8 @@ class StoneSlideView(StoneWidget):
     def current_index(self, value:int) -> None:
         if value >= len(self.children):
             raise IndexError(f'Index "{value}" outside of allowed range <0, {len(self.children) - 1}>')
+        if value == self._index:
+            return
         self._index = value
         self.push_command(self.set_view, index = self._index)
 
@@ -49,5 +57,10 @@ class StoneSlideView(StoneWidget):
 
     @auto_play.setter
     def auto_play(self, value:int) -> None:
+        if value == self._auto_play:
+            return
         self._auto_play = value
-        self.push_command(self.set_auto_play, auto_play = value)
\ No newline at end of file
+        self.push_command(self.set_auto_play, auto_play = value)
+
+StoneSlideView.set_view = StoneWidgetCommandType('set_view', StoneSlideView)
+StoneSlideView.set_auto_play = StoneWidgetCommandType('set_auto_play', StoneSlideView)
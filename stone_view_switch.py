@@ -1,17 +1,29 @@
-from typing import Optional
+from typing import MutableMapping, Optional
 from . import StoneWidget, StoneWidgetCommandType
 
 # this widget is purely virtual, does not exist on the display
 # only as an abstraction of multiple overlayed widgets
 class StoneViewSwitch(StoneWidget):
 
+    __slots__ = ('_index', '_shown_index', '_name_to_index')
+
     def __init__(self, name:str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
         self._index = 0
+        # index of the view made visible by the last refresh, None if all views have to be refreshed
+        self._shown_index:Optional[int] = None
+        # view indices mapped by view name
+        self._name_to_index:MutableMapping[str, int] = {}
 
     def add_page(self, name:str) -> StoneWidget:
         return StoneWidget(name, self)
 
+    def add_child(self, child:StoneWidget) -> None:
+        self._name_to_index[child.instance_name] = len(self.children)
+        super().add_child(child)
+        # the new view has to be hidden by the next refresh
+        self._shown_index = None
+
     @property
     def current_index(self) -> int:
         return self._index
@@ -37,13 +49,20 @@ class StoneViewSwitch(StoneWidget):
 
     @current_name.setter
     def current_name(self, value:str) -> None:
-        for i, name in enumerate(view.name for view in self.children):
-            if name == value:
-                self.current_index = i
+        index = self._name_to_index.get(value)
+        if index is not None:
+            self.current_index = index
 
     def refresh_views(self) -> None:
-        for view in self.children:
-            view.visible = view is self.current_view
+        if self._shown_index is None:
+            for view in self.children:
+                view.visible = view is self.current_view
+        # only the previously shown and the new view change
+        elif self._shown_index != self.current_index:
+            self.children[self._shown_index].visible = False
+            if self.current_view:
+                self.current_view.visible = True
+        self._shown_index = self.current_index
         self.invalidate()
 
     def invalidate(self) -> None:
@@ -1,5 +1,7 @@
 from typing import (
     Deque,
+    Dict,
+    Iterator,
     Tuple,
     MutableSequence,
     MutableMapping,
@@ -10,14 +12,16 @@ from typing import (
 )
 
 from charging_session.charging_session import PortAvailability
+from . import StoneCommand, StoneWidgetCommandType
+from .stone_commands import _dumps
 
 if TYPE_CHECKING:
     from . import (
         CommandValue,
         StoneCommandType,
-        StoneCommand,
         StoneResponseType,
         StoneResponse,
+        StoneDisplay,
     )
 
 class StoneWidget:
@@ -26,9 +30,30 @@ class StoneWidget:
     Contains functionality to assemble and enqueue commands, with general shared commands already implemented.
     """
 
+    __slots__ = (
+        'instance_name',
+        '_widget_field',
+        'command_queue',
+        'response_handlers',
+        '_enabled',
+        '_visible',
+        '_x',
+        '_y',
+        '_bg_image',
+        'children',
+        '_parent',
+        '_display',
+    )
+
     #! to be set in a subclass, used in commands to identify widget type
     type_name = 'widget'
 
+    #* general commands, shared by all instances (assigned below the class, as they need a reference to it)
+    set_enable:StoneWidgetCommandType
+    set_visible:StoneWidgetCommandType
+    set_xy:StoneWidgetCommandType
+    set_bg_image:StoneWidgetCommandType
+
     def __init__(self, name:str, parent:Optional['StoneWidget'] = None) -> None:
         """
         Instantiate a new widget, with a defined name, that is used to identify it in commands.
@@ -36,35 +61,34 @@ class StoneWidget:
         Args:
             name (str): The name of the widget instance, is used in this widgets commands so must match the name in the display.
         """
-        from . import StoneWidgetCommandType
-
         # name of this specific widget instance
         self.instance_name = name
+        # serialized widget field of the command headers, the name does not change so it is encoded only once
+        self._widget_field = b',"widget":' + _dumps(name)
         # "queue" of commands to be sent by the application, only one command per command type is permitted, 
         # to prevent writing the same command multiple times
-        self.command_queue:MutableMapping[str, 'StoneCommand'] = {}
+        # always a plain dict (mapped cmd_code --to-> command), its insertion order is the order commands are sent in
+        self.command_queue:Dict[str, StoneCommand] = {}
         # handler functions for responses from the display
         # mapped cmd_code --to-> handler function
         self.response_handlers:MutableMapping[int, Callable[..., None]] = {}
 
-        #* general commands
+        #* general command state
         # enabled
         self._enabled = True
-        self.set_enable = StoneWidgetCommandType('set_enable', StoneWidget)
         # visible
         self._visible = True
-        self.set_visible = StoneWidgetCommandType('set_visible', StoneWidget)
         # x/y coordinates
         self._x = -1
         self._y = -1
-        self.set_xy = StoneWidgetCommandType('set_xy', StoneWidget)
         # background image
         self._bg_image:Optional[str] = None
-        self.set_bg_image = StoneWidgetCommandType('set_bg_image', StoneWidget)
 
         #* hierarchy
         self.children:MutableSequence[StoneWidget] = []
         self._parent = parent
+        # display owning the widget tree, only set on the root widgets (windows) by the display
+        self._display:Optional['StoneDisplay'] = None
         if parent:
             parent.add_child(self)
 
@@ -88,11 +112,25 @@ class StoneWidget:
     def parent(self) -> Optional['StoneWidget']:
         return self._parent
 
+    @property
+    def display(self) -> Optional['StoneDisplay']:
+        if self._parent:
+            return self._parent.display
+        return self._display
+
+    def _invalidate_widget_tree(self) -> None:
+        display = self.display
+        if display:
+            display._invalidate_widget_tree()
+
     def add_response_handler(self, response:'StoneResponseType', func:Callable[..., None]) -> None:
         self.response_handlers[response.cmd_code] = func
 
     def add_child(self, child:'StoneWidget') -> None:
+        # the parent link is used to find the display when the child pushes commands
+        child._parent = self
         self.children.append(child)
+        self._invalidate_widget_tree()
 
     def push_command(self, command:Union['StoneCommandType', 'StoneCommand'], **kwargs:'CommandValue') -> None:
         """
@@ -101,24 +139,32 @@ class StoneWidget:
         Args:
             command (StoneWidgetCommand): Command object to be added to the queue.
         """
-        from . import StoneCommandType, StoneWidgetCommandType
-        # if the command type is a widget type 
-        # create widget command type with a reference to this widget
-        if isinstance(command, StoneWidgetCommandType):
-            command = command.for_widget(self)
-
-        # in case the command is a type, not an instance,
-        # create an instance from the type
-        if isinstance(command, StoneCommandType):
-            command = command.new()
+        # command types carry the command code as well, so the queue can be checked before building anything,
+        # if a command built from the same type (sharing its pool) is still queued, only its values are replaced,
+        # command instances pushed by the caller are never modified
+        queued = self.command_queue.get(command.cmd_code)
+        if (
+            queued is not None
+            and queued._owned
+            and queued._pool is command._pool
+            and not isinstance(command, StoneCommand)
+        ):
+            if queued.cmd_items != kwargs:
+                queued.cmd_items.clear()
+                queued.update(kwargs)
+            return
 
-        # write kwargs into command object
-        for key, value in kwargs.items():
-            command[key] = value
+        # command types create a command instance (for this widget, in case of widget commands),
+        # command instances are used as they are, both with the kwargs written into them
+        command = command.build(self, kwargs)
 
         # ensure only one command with the same name can be in the queue
         # this throws away the old command if not yet sent
         self.command_queue[command.cmd_code] = command
+        # let the display know it has commands to gather from this widget
+        display = self.display
+        if display:
+            display._add_pending_widget(self)
 
     def handle_response(self, response:'StoneResponse') -> None:
         if response.cmd_code not in self.response_handlers:
@@ -133,15 +179,29 @@ class StoneWidget:
         if not self.has_commands:
             raise ValueError('Cannot pop command when command queue is empty!')
 
-        first_key, *_ = self.command_queue.keys()
+        # dicts keep insertion order, the first key is the oldest command
+        first_key = next(iter(self.command_queue))
         return self.command_queue.pop(first_key)
 
+    def drain_commands(self) -> Iterator['StoneCommand']:
+        """
+        Take all queued commands at once, in the order they were pushed.
+        The queue is swapped for an empty one, instead of popping the commands one by one.
+
+        Yields:
+            StoneCommand: Commands which were in the queue.
+        """
+        commands, self.command_queue = self.command_queue, {}
+        yield from commands.values()
+
     @property
     def enabled(self) -> bool:
         return self._enabled
 
     @enabled.setter
     def enabled(self, value:bool) -> None:
+        if value == self._enabled:
+            return
         self._enabled = value
         self.push_command(self.set_enable, enable = self._enabled)
 
@@ -151,6 +211,8 @@ class StoneWidget:
 
     @visible.setter
     def visible(self, value:bool) -> None:
+        if value == self._visible:
+            return
         self._visible = value
         self.push_command(self.set_visible, visible = self._visible)
 
@@ -160,7 +222,34 @@ class StoneWidget:
 
     @xy.setter
     def xy(self, value:Tuple[int, int]) -> None:
-        self._x, self._y = value
+        x, y = value
+        if x == self._x and y == self._y:
+            return
+        self._x, self._y = x, y
+        self.push_command(self.set_xy, x = self._x, y = self._y)
+
+    # single coordinates, without building a tuple,
+    # setting both one after another still sends only one command, as the queued one is replaced
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @x.setter
+    def x(self, value:int) -> None:
+        if value == self._x:
+            return
+        self._x = value
+        self.push_command(self.set_xy, x = self._x, y = self._y)
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    @y.setter
+    def y(self, value:int) -> None:
+        if value == self._y:
+            return
+        self._y = value
         self.push_command(self.set_xy, x = self._x, y = self._y)
 
     @property
@@ -169,5 +258,12 @@ class StoneWidget:
 
     @bg_image.setter
     def bg_image(self, value:Optional[str]) -> None:
+        if value == self._bg_image:
+            return
         self._bg_image = value
         self.push_command(self.set_bg_image, bg_image = value if value else '')
+
+StoneWidget.set_enable = StoneWidgetCommandType('set_enable', StoneWidget)
+StoneWidget.set_visible = StoneWidgetCommandType('set_visible', StoneWidget)
+StoneWidget.set_xy = StoneWidgetCommandType('set_xy', StoneWidget)
+StoneWidget.set_bg_image = StoneWidgetCommandType('set_bg_image', StoneWidget)
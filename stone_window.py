@@ -3,22 +3,36 @@ from . import StoneWidget, StoneCommandType, StoneWidgetCommandType
 
 class StoneWindow(StoneWidget):
 
+    __slots__ = ('_displayed',)
+
     type_name = 'window'
     back_win = StoneCommandType('back_win', type_name)
+    open_win = StoneWidgetCommandType('open_win', StoneWidget)
+    close_win = StoneWidgetCommandType('close_win', StoneWidget)
+    back_win_to = StoneWidgetCommandType('back_win_to', StoneWidget)
     _current_win:Optional['StoneWindow'] = None
 
     def __init__(self, name: str, parent:Optional[StoneWidget] = None) -> None:
         super().__init__(name, parent)
-
-        self.open_win = StoneWidgetCommandType('open_win', StoneWidget)
-        self.close_win = StoneWidgetCommandType('close_win', StoneWidget)
-        self.back_win_to = StoneWidgetCommandType('back_win_to', StoneWidget)
+        # cached result of is_displayed, None when it has to be computed again
+        self._displayed:Optional[bool] = None
 
     @property
     def is_displayed(self) -> bool:
-        if not super().is_displayed:
-            return False
-        return self.current_win is self
+        # only cached for top level windows, a parent widget does not reset the cache when it changes,
+        # checked on every read, as a window can be attached to a parent after the result was cached
+        if self._parent is not None:
+            return super().is_displayed and StoneWindow._current_win is self
+        displayed = self._displayed
+        if displayed is None:
+            # the class attribute directly, skipping the current_win property
+            displayed = self._displayed = self._visible and StoneWindow._current_win is self
+        return displayed
+
+    @StoneWidget.visible.setter
+    def visible(self, value:bool) -> None:
+        StoneWidget.visible.fset(self, value)
+        self._displayed = None
 
     def open(self) -> None:
         """
@@ -26,7 +40,12 @@ class StoneWindow(StoneWidget):
         """
         self.visible = True
         self.push_command(self.open_win)
+        previous_win = StoneWindow._current_win
         StoneWindow._current_win = self
+        # both windows change whether they are displayed
+        if previous_win is not None:
+            previous_win._displayed = None
+        self._displayed = None
         self.invalidate()
 
     @property